@@ -0,0 +1,140 @@
+import os
+import gzip
+import json
+import time
+import hashlib
+import asyncio
+import logging
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+import aiohttp
+
+# On-disk cache of rendered page markdown, revalidated with conditional HEAD requests
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "web-scraper", "pages")
+MAX_CACHE_ENTRIES = 500
+HEAD_TIMEOUT = aiohttp.ClientTimeout(total=10)
+
+def _cache_paths(url: str) -> tuple[str, str]:
+    """Return the markdown and metadata file paths for a URL"""
+    key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+    return os.path.join(CACHE_DIR, f"{key}.md.gz"), os.path.join(CACHE_DIR, f"{key}.json")
+
+def _read_entry(url: str) -> Optional[Dict[str, Any]]:
+    """Read a cache entry's metadata, or None if the URL is not cached"""
+    markdown_path, meta_path = _cache_paths(url)
+    if not os.path.exists(markdown_path) or not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logging.warning(f"Ignoring unreadable page cache entry for {url}: {str(e)}")
+        return None
+
+def _load_entry(url: str, meta: Dict[str, Any]) -> SimpleNamespace:
+    """Load cached markdown as a crawl result and mark the entry as recently used"""
+    markdown_path, meta_path = _cache_paths(url)
+    with gzip.open(markdown_path, 'rt', encoding='utf-8') as f:
+        markdown = f.read()
+    os.utime(meta_path)
+    return SimpleNamespace(
+        success=True,
+        markdown=markdown,
+        links=meta.get("links", {}),
+        media=meta.get("media", {}),
+        status_code=meta.get("status_code"),
+        error_message=None
+    )
+
+def _mtime(path: str) -> float:
+    """Return a file's mtime, or 0 if it was removed concurrently"""
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0
+
+def _prune() -> None:
+    """Evict least recently used entries beyond MAX_CACHE_ENTRIES"""
+    names = set(os.listdir(CACHE_DIR))
+    # Only metadata files with matching markdown are page entries
+    entries = [
+        os.path.join(CACHE_DIR, name) for name in names
+        if name.endswith('.json') and name[:-len('.json')] + '.md.gz' in names
+    ]
+    if len(entries) <= MAX_CACHE_ENTRIES:
+        return
+    entries.sort(key=_mtime)
+    for meta_path in entries[:len(entries) - MAX_CACHE_ENTRIES]:
+        for path in (meta_path, meta_path[:-len('.json')] + '.md.gz'):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def _store_entry(url: str, result: Any, etag: Optional[str], last_modified: Optional[str]) -> None:
+    """Write a crawl result's markdown and metadata to the cache"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    markdown_path, meta_path = _cache_paths(url)
+    with gzip.open(markdown_path, 'wt', encoding='utf-8') as f:
+        f.write(str(result.markdown or ""))
+    meta = {
+        "etag": etag,
+        "last_modified": last_modified,
+        "fetched_at": time.time(),
+        "status_code": result.status_code,
+        "links": result.links,
+        "media": result.media
+    }
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, default=str)
+    _prune()
+
+def open_revalidation_session() -> aiohttp.ClientSession:
+    """
+    Creates the HTTP session used for revalidation requests, shared across a scrape
+    """
+    return aiohttp.ClientSession(timeout=HEAD_TIMEOUT)
+
+async def load_cached_page(url: str, http_session: aiohttp.ClientSession) -> Optional[SimpleNamespace]:
+    """
+    Returns the cached crawl result for a URL if the server confirms it is unchanged
+    """
+    meta = await asyncio.to_thread(_read_entry, url)
+    if meta is None:
+        return None
+
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    if not headers:
+        return None
+
+    try:
+        async with http_session.head(url, headers=headers, allow_redirects=True) as response:
+            # Some servers ignore conditional HEADs, so also compare the ETag directly
+            unchanged = response.status == 304 or (
+                meta.get("etag") is not None and response.headers.get("ETag") == meta["etag"]
+            )
+        if not unchanged:
+            return None
+        logging.info(f"Using cached page for {url}")
+        return await asyncio.to_thread(_load_entry, url, meta)
+    except Exception as e:
+        logging.warning(f"Page cache revalidation failed for {url}: {str(e)}")
+        return None
+
+async def store_cached_page(url: str, result: Any) -> None:
+    """
+    Caches a successful crawl result when the server supplied validators for it
+    """
+    response_headers = {key.lower(): value for key, value in (getattr(result, "response_headers", None) or {}).items()}
+    etag = response_headers.get("etag")
+    last_modified = response_headers.get("last-modified")
+    if not etag and not last_modified:
+        return
+    try:
+        await asyncio.to_thread(_store_entry, url, result, etag, last_modified)
+    except Exception as e:
+        logging.warning(f"Failed to cache page {url}: {str(e)}")
@@ -1,17 +1,82 @@
 import os
 import json
-from typing import List, Dict
+import hashlib
+import tempfile
+from typing import List, Dict, Optional
 import google.generativeai as genai
 from dotenv import load_dotenv
 import logging
-from urllib.parse import urljoin
+from urllib.parse import urlparse, urljoin, urlsplit
 import re
+from bisect import bisect_right
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
+# Pagination URL patterns fused into a single alternation, compiled once at import.
+# Query parameters are anchored at ? or & and path segments at / so the
+# matcher rejects non-URL text early instead of scanning for bare keywords.
+_PAGINATION_RE = re.compile(
+    r'[?&]p(?:age(?:_num)?)?=\d+'
+    r'|[?&](?:offset|start|from)=\d+'
+    r'|[?&]cursor=[\w-]+'  # For cursor-based pagination
+    r'|/p(?:age)?/\d+/?'
+    r'|page-\d+\.html'
+    r'|/load-more/\d+',
+    re.IGNORECASE
+)
+
+# Byte-level variants for scanning whole markdown documents, preferring
+# Hyperscan's SIMD-accelerated matcher when it is installed
+_PAGINATION_BYTES_RE = re.compile(_PAGINATION_RE.pattern.encode('utf-8'), re.IGNORECASE)
+_PAGINATION_DB = None
+if hyperscan is not None:
+    try:
+        _PAGINATION_DB = hyperscan.Database()
+        _PAGINATION_DB.compile(
+            expressions=[_PAGINATION_RE.pattern.encode('utf-8')],
+            ids=[0],
+            flags=[hyperscan.HS_FLAG_CASELESS]
+        )
+    except Exception as e:
+        logging.warning(f"Hyperscan unavailable, falling back to re: {str(e)}")
+        _PAGINATION_DB = None
+
+# Absolute URLs embedded in markdown text, ending at whitespace, brackets or quotes
+_URL_TOKEN_RE = re.compile(rb'https?://[^\s()<>\[\]"\']+', re.IGNORECASE)
+_TRAILING_PUNCTUATION = '.,;:!?'
+
+# Targets of markdown links, e.g. [2](https://example.com/page/2)
+_LINK_TARGET_RE = re.compile(r'\]\((https?://[^)\s]+)')
+
+# Minimum number of locally found pagination URLs needed to skip the Gemini call
+LOCAL_MATCH_THRESHOLD = 2
+
+# Per-output-directory cache of detected pagination URLs
+CACHE_FILENAME = ".pagination_cache.json"
+
+# Shared cache used while scraping, before any output directory exists
+PAGINATION_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "web-scraper", "pagination", "pagination_cache.json")
+MAX_PAGINATION_CACHE_ENTRIES = 500
+
+# Whether the Gemini SDK has been configured in this process
+_configured = False
+
 def configure_gemini_api() -> bool:
-    """Configure Gemini API with key from environment"""
+    """Configure Gemini API with key from environment, once per process"""
+    global _configured
+    if _configured:
+        return True
     try:
         load_dotenv()
         api_key = os.getenv("GEMINI_API_KEY")
@@ -20,6 +85,7 @@ def configure_gemini_api() -> bool:
             return False
         
         genai.configure(api_key=api_key)
+        _configured = True
         return True
     except Exception as e:
         logging.error(f"Failed to configure Gemini API: {str(e)}")
@@ -35,39 +101,67 @@ def read_first_page_content(output_dir: str) -> tuple[str, str]:
     try:
         with open(page_file, 'r', encoding='utf-8') as f:
             content = f.read()
-            # Extract base URL from second line
-            lines = content.split('\n')
-            for line in lines:
-                if line.startswith('URL: '):
-                    base_url = line.replace('URL: ', '').strip()
-                    return content, base_url
+            # Extract base URL from second line (written by scraper.py as "URL: ...")
+            header = content.split('\n', 2)
+            if len(header) > 1 and header[1].startswith('URL: '):
+                base_url = header[1][len('URL: '):].strip()
+                return content, base_url
     except Exception as e:
         logging.error(f"Error reading first page content: {str(e)}")
     return None, None
 
-def detect_pagination_elements(markdown_content: str, base_url: str) -> List[str]:
-    """Use Gemini to detect pagination links from markdown content"""
+def detect_pagination_urls_local(markdown_content: str) -> List[str]:
+    """Find absolute pagination URLs in markdown content without calling Gemini"""
+    data = markdown_content.encode('utf-8')
+    tokens = [match.span() for match in _URL_TOKEN_RE.finditer(data)]
+
+    if _PAGINATION_DB is not None:
+        # Map each reported match end back to the URL token containing it
+        token_starts = [start for start, _ in tokens]
+        hits = set()
+
+        def on_match(pattern_id, start, end, flags, context):
+            index = bisect_right(token_starts, end - 1) - 1
+            if index >= 0 and end <= tokens[index][1]:
+                hits.add(index)
+
+        _PAGINATION_DB.scan(data, match_event_handler=on_match)
+        candidates = [tokens[index] for index in sorted(hits)]
+    else:
+        candidates = [(start, end) for start, end in tokens if _PAGINATION_BYTES_RE.search(data, start, end)]
+
+    urls = []
+    for start, end in candidates:
+        url = data[start:end].decode('utf-8', errors='ignore').rstrip(_TRAILING_PUNCTUATION)
+        if _PAGINATION_RE.search(url):
+            urls.append(url)
+
+    # Remove duplicates while preserving order
+    return list(dict.fromkeys(urls))
+
+def _trim_for_prompt(markdown_content: str, head: int = 4000, tail: int = 4000) -> str:
+    """Keep only the start and end of the markdown, where pagination controls live"""
+    if len(markdown_content) <= head + tail:
+        return markdown_content
+    return markdown_content[:head] + "\n...\n" + markdown_content[-tail:]
+
+def detect_pagination_elements(markdown_content: str, base_url: str, max_urls: Optional[int] = None) -> List[str]:
+    """Use Gemini to detect pagination links from markdown content, stopping early once max_urls are found"""
     try:
+        # Pages with explicit same-site pagination links don't need the LLM round-trip
+        base_host = urlsplit(base_url).netloc.lower()
+        link_targets = set(_LINK_TARGET_RE.findall(markdown_content))
+        local_urls = [
+            url for url in detect_pagination_urls_local(markdown_content)
+            if url != base_url and url in link_targets and urlsplit(url).netloc.lower() == base_host
+        ]
+        if len(local_urls) >= LOCAL_MATCH_THRESHOLD:
+            logging.info(f"Found {len(local_urls)} pagination URLs locally: {local_urls}")
+            return local_urls[:max_urls] if max_urls is not None else local_urls
+
         if not configure_gemini_api():
             return []
 
-        # Enhanced pagination patterns
-        pagination_patterns = [
-            # Existing patterns
-            r'page-\d+\.html',
-            r'page_num=\d+',
-            r'/page/\d+/?',
-            r'page=\d+',
-            r'/p/\d+',
-            r'[?&]p=\d+',
-            # New patterns
-            r'offset=\d+',
-            r'start=\d+',
-            r'[?&]from=\d+',
-            r'/load-more/\d+',
-            r'cursor=[\w-]+',  # For cursor-based pagination
-        ]
-
         # Enhanced prompt with more specific instructions
         prompt = f"""
         Extract all pagination URLs from this markdown content.
@@ -88,7 +182,7 @@ def detect_pagination_elements(markdown_content: str, base_url: str) -> List[str
         7. Check for data-* attributes that might indicate pagination
 
         Content to analyze:
-        {markdown_content}
+        {_trim_for_prompt(markdown_content)}
         """
 
         model = genai.GenerativeModel(
@@ -100,21 +194,19 @@ def detect_pagination_elements(markdown_content: str, base_url: str) -> List[str
             }
         )
 
-        completion = model.generate_content(prompt)
-        response_text = completion.text.strip()
-        
-        # Process URLs with validation
+        # Process URLs with validation, skipping duplicates before validating them
         urls = []
-        for line in response_text.split('\n'):
+        seen = set()
+
+        def add_url(line: str) -> None:
             line = line.strip()
             if not line:
-                continue
-                
+                return
+
             # Validate and normalize URL
             try:
                 # Handle relative URLs
                 if not line.startswith('http'):
-                    from urllib.parse import urlparse, urljoin
                     parsed_base = urlparse(base_url)
                     base_domain = f"{parsed_base.scheme}://{parsed_base.netloc}"
                     
@@ -127,26 +219,104 @@ def detect_pagination_elements(markdown_content: str, base_url: str) -> List[str
                 else:
                     url = line
 
+                if url in seen:
+                    return
+                seen.add(url)
+
                 # Validate URL matches pagination patterns
-                if any(re.search(pattern, url, re.IGNORECASE) for pattern in pagination_patterns):
+                if _PAGINATION_RE.search(url):
                     urls.append(url)
                     
             except Exception as e:
                 logging.warning(f"Invalid URL found: {line} - {str(e)}")
-                continue
 
-        # Remove duplicates while preserving order
-        unique_urls = list(dict.fromkeys(urls))
-        
-        if unique_urls:
-            logging.info(f"Found {len(unique_urls)} pagination URLs: {unique_urls}")
+        # Stream the response and validate each line as soon as it is complete
+        response = model.generate_content(prompt, stream=True)
+        buffer = ''
+        for chunk in response:
+            try:
+                buffer += chunk.text
+            except ValueError as e:
+                # Chunks without text parts (e.g. a final MAX_TOKENS or SAFETY chunk) end the stream
+                logging.warning(f"Stopping pagination response early: {str(e)}")
+                break
+            *lines, buffer = buffer.split('\n')
+            for line in lines:
+                add_url(line)
+            if max_urls is not None and len(urls) >= max_urls:
+                buffer = ''
+                break
+        add_url(buffer)
+
+        if max_urls is not None:
+            urls = urls[:max_urls]
+
+        if urls:
+            logging.info(f"Found {len(urls)} pagination URLs: {urls}")
         
-        return unique_urls
+        return urls
 
     except Exception as e:
         logging.error(f"Error in pagination detection: {str(e)}")
         return []
 
+def load_pagination_cache(cache_path: str) -> Dict[str, Dict]:
+    """Load the pagination cache, returning an empty cache if missing or unreadable"""
+    if not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'rb') as f:
+            data = f.read()
+        cache = orjson.loads(data) if orjson is not None else json.loads(data)
+        return cache if isinstance(cache, dict) else {}
+    except Exception as e:
+        logging.warning(f"Ignoring unreadable pagination cache {cache_path}: {str(e)}")
+        return {}
+
+def save_pagination_cache(cache_path: str, cache: Dict[str, Dict]) -> None:
+    """Atomically write the pagination cache next to the scraped pages"""
+    try:
+        os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path) or '.', suffix='.tmp')
+        data = orjson.dumps(cache) if orjson is not None else json.dumps(cache).encode('utf-8')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        logging.warning(f"Failed to write pagination cache {cache_path}: {str(e)}")
+
+def detect_pagination_elements_cached(
+    markdown_content: str,
+    base_url: str,
+    max_urls: Optional[int] = None,
+    cache_path: str = PAGINATION_CACHE_PATH,
+    mtime: Optional[float] = None
+) -> List[str]:
+    """Detect pagination links, serving repeated runs on the same content from the local cache"""
+    key = hashlib.sha256((base_url + markdown_content).encode('utf-8')).hexdigest()
+    cache = load_pagination_cache(cache_path)
+
+    entry = cache.get(key)
+    if isinstance(entry, dict) and entry.get("mtime") == mtime:
+        cached_urls = entry.get("urls", [])
+        cached_max = entry.get("max_urls")
+        # A capped entry only answers requests within its cap, unless detection found fewer
+        if cached_max is None or (max_urls is not None and max_urls <= cached_max) or len(cached_urls) < cached_max:
+            logging.info(f"Using cached pagination URLs for {base_url}")
+            return cached_urls[:max_urls] if max_urls is not None else cached_urls
+
+    urls = detect_pagination_elements(markdown_content, base_url, max_urls)
+    # Empty results may come from API failures, so only cache real detections
+    if urls:
+        cache.pop(key, None)
+        cache[key] = {"mtime": mtime, "max_urls": max_urls, "urls": urls}
+        # Drop the oldest entries once the cache grows past its limit
+        for stale_key in list(cache)[:-MAX_PAGINATION_CACHE_ENTRIES]:
+            del cache[stale_key]
+        save_pagination_cache(cache_path, cache)
+
+    return urls
+
 def get_pagination_urls(output_dir: str) -> List[str]:
     """Get pagination URLs from the specified output directory"""
     try:
@@ -154,7 +324,14 @@ def get_pagination_urls(output_dir: str) -> List[str]:
         if not content or not base_url:
             return []
 
-        return detect_pagination_elements(content, base_url)
+        # Serve repeated runs on the same snapshot from the output directory's cache
+        page_file = os.path.join(output_dir, "page_1.md")
+        return detect_pagination_elements_cached(
+            content,
+            base_url,
+            cache_path=os.path.join(output_dir, CACHE_FILENAME),
+            mtime=os.path.getmtime(page_file)
+        )
 
     except Exception as e:
         logging.error(f"Error getting pagination URLs: {str(e)}")
@@ -1,10 +1,22 @@
 import asyncio
 import os
+import re
+import time
+import weakref
+from contextlib import asynccontextmanager
+import aiohttp
 from datetime import datetime
-from urllib.parse import urljoin
-from crawl4ai import AsyncWebCrawler
-from typing import Dict, Any, List
+from urllib.parse import urljoin, urlsplit
+from crawl4ai import AsyncWebCrawler, BrowserConfig
+from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
+from pagination_detector import detect_pagination_elements_cached
+from page_cache import load_cached_page, store_cached_page, open_revalidation_session
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 class PaginationResult(BaseModel):
     """Represents the result of pagination detection and scraping"""
@@ -13,19 +25,120 @@ class PaginationResult(BaseModel):
     success: bool
     error: str = None
 
-async def scrape_webpage(url: str, handle_pagination: bool = False, max_pages: int = 10) -> Dict[str, Any]:
+# Link text of "More"/"Next" style pagination controls
+_MORE_RE = re.compile(r'\b(?:more|next|load\s*more|show\s*more)\b|[»›⟩]', re.IGNORECASE)
+
+# Per-line leading/trailing whitespace and runs of empty lines in page markdown
+_LINE_WS = re.compile(r'^[^\S\n]+|[^\S\n]+$', re.MULTILINE)
+_BLANK_LINES = re.compile(r'\n{2,}')
+
+# Lightweight headless browser shared by every page fetch
+BROWSER_CONFIG = BrowserConfig(
+    headless=True,
+    verbose=True,
+    viewport_width=800,
+    viewport_height=600,
+    extra_args=["--disable-gpu", "--disable-dev-shm-usage", "--no-sandbox"]
+)
+
+# Maximum number of requests started per second against a single host
+HOST_RATE_LIMIT = 5
+
+# Per-host request slots, kept per event loop since asyncio primitives are loop-bound
+_host_semaphores = weakref.WeakKeyDictionary()
+
+@asynccontextmanager
+async def throttle(url: str):
+    """
+    Limits requests to the URL's host to HOST_RATE_LIMIT per second
+
+    Each host has HOST_RATE_LIMIT slots and a slot stays taken for at least
+    one second after it was acquired. The cool-down runs on a timer, so the
+    caller continues as soon as its request finishes.
+    """
+    host_slots = _host_semaphores.setdefault(asyncio.get_running_loop(), {})
+    host = urlsplit(url).netloc
+    if host not in host_slots:
+        host_slots[host] = asyncio.Semaphore(HOST_RATE_LIMIT)
+    semaphore = host_slots[host]
+
+    await semaphore.acquire()
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        remaining = 1.0 - (time.monotonic() - started)
+        if remaining > 0:
+            asyncio.get_running_loop().call_later(remaining, semaphore.release)
+        else:
+            semaphore.release()
+
+LOAD_MORE_SELECTORS = [
+    'button:contains("More")',
+    'button:contains("Load More")',
+    'a:contains("More")',
+    '.load-more',
+    '#more',
+    '.more-button'
+]
+
+async def fetch_page(crawler: AsyncWebCrawler, url: str, session_id: Optional[str] = None, http_session: Optional[aiohttp.ClientSession] = None):
+    """
+    Fetches a single page with the scraper's crawl options
+
+    Pages fetched with the same session_id reuse one browser tab.
+    Requests are rate limited per host. When an http_session is given,
+    pages the server reports as unchanged are served from the local page
+    cache without rendering.
+    """
+    async with throttle(url):
+        if http_session is not None:
+            cached = await load_cached_page(url, http_session)
+            if cached is not None:
+                return cached
+
+        result = await crawler.arun(
+            url=url,
+            session_id=session_id,
+            exclude_external_links=False,
+            exclude_social_media_links=False,
+            exclude_external_images=False,
+            load_more_selectors=LOAD_MORE_SELECTORS
+        )
+
+    if result.success:
+        await store_cached_page(url, result)
+    return result
+
+def page_statistics(result) -> Dict[str, int]:
+    """
+    Calculates link and media statistics for a crawled page
+    """
+    return {
+        "total_internal_links": len(result.links.get("internal", [])),
+        "total_external_links": len(result.links.get("external", [])),
+        "total_images": len(result.media.get("images", [])),
+        "total_videos": len(result.media.get("videos", [])),
+        "total_audios": len(result.media.get("audios", []))
+    }
+
+async def scrape_webpage(url: str, handle_pagination: bool = False, max_pages: int = 10, max_concurrent: int = 5) -> Dict[str, Any]:
     """
     Scrapes a webpage and returns markdown content and statistics
+
+    The first page is fetched on its own. When pagination is enabled, the
+    pagination URLs detected on it are then fetched concurrently, with at
+    most max_concurrent requests in flight; if none are detected, "More"
+    links are followed page by page instead.
     
     Args:
         url (str): The URL to scrape
         handle_pagination (bool): Whether to handle pagination
         max_pages (int): Maximum number of pages to scrape if pagination is enabled
+        max_concurrent (int): Maximum number of pagination pages fetched at once
     """
     try:
         pages_content = []
-        current_page = 1
-        current_url = url
         combined_stats = {
             "total_internal_links": 0,
             "total_external_links": 0,
@@ -34,90 +147,103 @@ async def scrape_webpage(url: str, handle_pagination: bool = False, max_pages: i
             "total_audios": 0
         }
 
-        async with AsyncWebCrawler(verbose=True) as crawler:
-            while True:
-                result = await crawler.arun(
-                    url=current_url,
-                    exclude_external_links=False,
-                    exclude_social_media_links=False,
-                    exclude_external_images=False,
-                    load_more_selectors=[
-                        'button:contains("More")',
-                        'button:contains("Load More")',
-                        'a:contains("More")',
-                        '.load-more',
-                        '#more',
-                        '.more-button'
-                    ]
-                )
-
-                if not result.success:
-                    return {
-                        "success": False,
-                        "error": result.error_message,
-                        "status_code": result.status_code
-                    }
-
-                # Calculate statistics for current page
-                stats = {
-                    "total_internal_links": len(result.links.get("internal", [])),
-                    "total_external_links": len(result.links.get("external", [])),
-                    "total_images": len(result.media.get("images", [])),
-                    "total_videos": len(result.media.get("videos", [])),
-                    "total_audios": len(result.media.get("audios", []))
+        def add_page(page_url: str, result) -> None:
+            # Calculate statistics for the page and update combined statistics
+            stats = page_statistics(result)
+            for key in combined_stats:
+                combined_stats[key] += stats[key]
+
+            # Store page content
+            pages_content.append({
+                "url": page_url,
+                "content": result.markdown,
+                "page_number": len(pages_content) + 1,
+                "statistics": stats
+            })
+
+        # Sequential fetches share one browser tab; concurrent fetches get their own
+        session_id = f"scrape_{id(pages_content)}"
+
+        # One HTTP session for all cache revalidation requests, closed with the crawler
+        async with AsyncWebCrawler(config=BROWSER_CONFIG) as crawler, open_revalidation_session() as http_session:
+            # Phase 1: fetch the first page
+            result = await fetch_page(crawler, url, session_id, http_session)
+            if not result.success:
+                return {
+                    "success": False,
+                    "error": result.error_message,
+                    "status_code": result.status_code
                 }
+            add_page(url, result)
+            status_code = result.status_code
+
+            if handle_pagination and max_pages > 1:
+                # Phase 2: detect pagination URLs on the first page and fetch them concurrently
+                # One extra URL is requested in case the detector returns the current page
+                detected_urls = await asyncio.to_thread(detect_pagination_elements_cached, result.markdown, url, max_pages)
+                pagination_urls = [page_url for page_url in detected_urls if page_url != url][:max_pages - 1]
 
-                # Update combined statistics
-                for key in combined_stats:
-                    combined_stats[key] += stats[key]
-
-                # Store page content
-                pages_content.append({
-                    "url": current_url,
-                    "content": result.markdown,
-                    "page_number": current_page,
-                    "statistics": stats
-                })
-
-                if not handle_pagination or current_page >= max_pages:
-                    break
-
-                # Try to find and click "Load More" button first
-                next_page_url = None
-                load_more_clicked = False
-                
-                for link in result.links.get("internal", []):
-                    href = link.get("href", "")
-                    text = link.get("text", "").lower()
-                    if "more" in text:
-                        if link.get("is_button", False):
-                            # This is a "Load More" button that was clicked
-                            load_more_clicked = True
-                            current_url = url  # Stay on same URL since content is loaded dynamically
-                            break
-                        else:
-                            # This might be a "Next Page" link
-                            next_page_url = urljoin(current_url, href)
-                            break
-
-                if load_more_clicked:
-                    # Content was loaded dynamically, continue with same URL
-                    current_page += 1
-                    await asyncio.sleep(1.0)  # Rate limiting
-                    continue
-                elif not next_page_url:
-                    break
-
-                current_url = next_page_url
-                current_page += 1
-                await asyncio.sleep(1.0)  # Rate limiting
+                if pagination_urls:
+                    semaphore = asyncio.Semaphore(max(1, max_concurrent))
+
+                    async def fetch_bounded(page_url: str):
+                        async with semaphore:
+                            return await fetch_page(crawler, page_url, http_session=http_session)
+
+                    results = await asyncio.gather(
+                        *(fetch_bounded(page_url) for page_url in pagination_urls),
+                        return_exceptions=True
+                    )
+                    for page_url, page_result in zip(pagination_urls, results):
+                        if isinstance(page_result, Exception):
+                            print(f"Skipping {page_url}: {page_result}")
+                            continue
+                        if not page_result.success:
+                            print(f"Skipping {page_url}: {page_result.error_message}")
+                            continue
+                        add_page(page_url, page_result)
+                else:
+                    # No pagination URLs detected, follow "More" links sequentially
+                    current_url = url
+                    while len(pages_content) < max_pages:
+                        # Try to find and click "Load More" button first
+                        next_page_url = None
+                        load_more_clicked = False
+
+                        for link in result.links.get("internal", []):
+                            href = link.get("href", "")
+                            if _MORE_RE.search(link.get("text", "")):
+                                if link.get("is_button", False):
+                                    # This is a "Load More" button that was clicked
+                                    load_more_clicked = True
+                                    current_url = url  # Stay on same URL since content is loaded dynamically
+                                    break
+                                else:
+                                    # This might be a "Next Page" link
+                                    next_page_url = urljoin(current_url, href)
+                                    break
+
+                        if not load_more_clicked:
+                            if not next_page_url:
+                                break
+                            current_url = next_page_url
+
+                        result = await fetch_page(crawler, current_url, session_id, http_session)
+                        if not result.success:
+                            return {
+                                "success": False,
+                                "error": result.error_message,
+                                "status_code": result.status_code
+                            }
+                        add_page(current_url, result)
+                        status_code = result.status_code
 
             return {
                 "success": True,
                 "pages": pages_content,
-                "total_pages": current_page,
+                "total_pages": len(pages_content),
                 "combined_statistics": combined_stats,
-                "status_code": result.status_code
+                "status_code": status_code
             }
 
     except Exception as e:
@@ -140,6 +266,18 @@ def print_statistics(stats: Dict[str, int], total_pages: int = 1) -> None:
     print(f"Audio Elements Found: {stats['total_audios']}")
     print("=====================")
 
+def save_page(output_dir: str, page: Dict[str, Any]) -> None:
+    """
+    Writes a scraped page to page_N.md in the output directory
+    """
+    page_filename = f"page_{page['page_number']}.md"
+    with open(os.path.join(output_dir, page_filename), "w", encoding="utf-8") as f:
+        f.write(f"# Page {page['page_number']}\n")
+        f.write(f"URL: {page['url']}\n\n")
+        # Remove extra whitespace and empty lines while preserving markdown formatting
+        cleaned_content = _BLANK_LINES.sub("\n", _LINE_WS.sub("", page["content"])).strip("\n")
+        f.write(cleaned_content)
+
 async def main():
     # Get URL from user
     url = input("Enter the webpage URL to scrape: ")
@@ -162,24 +300,22 @@ async def main():
 
     # Create output directory with timestamp
     timestamp = datetime.now().strftime("%Y_%m_%d__%H_%M_%S")
-    output_dir = f"output/{url.split('//')[1].split('/')[0]}_{timestamp}"
+    host = urlsplit(url).netloc or "unknown"
+    output_dir = f"output/{host}_{timestamp}"
     os.makedirs(output_dir, exist_ok=True)
 
     # Print combined statistics
     print_statistics(result["combined_statistics"], result["total_pages"])
 
-    # Save content from all pages
-    for page in result["pages"]:
-        page_filename = f"page_{page['page_number']}.md"
-        with open(os.path.join(output_dir, page_filename), "w", encoding="utf-8") as f:
-            f.write(f"# Page {page['page_number']}\n")
-            f.write(f"URL: {page['url']}\n\n")
-            # Remove extra whitespace and empty lines while preserving markdown formatting
-            cleaned_content = "\n".join(line.strip() for line in page["content"].splitlines() if line.strip())
-            f.write(cleaned_content)
+    # Save content from all pages concurrently without blocking the event loop
+    await asyncio.gather(*(asyncio.to_thread(save_page, output_dir, page) for page in result["pages"]))
 
     print(f"\nFiles saved in directory: {output_dir}")
     print(f"Total pages scraped: {result['total_pages']}")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # Faster event loop when available; only used when run as a script
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())